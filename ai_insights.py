@@ -1,122 +1,794 @@
+import asyncio
+import copy
+import functools
+import hashlib
 import json
 import os
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Literal, Any, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+
+# Maximum number of completions kept in the in-memory response cache
+RESPONSE_CACHE_SIZE = 512
+
+# OpenAI clients shared across instances so their connection pools are reused
+_CLIENTS: Dict[str, OpenAI] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def _get_sync_client(api_key: str) -> OpenAI:
+    """
+    Get the shared OpenAI client for an API key, creating it on first use
+    
+    Args:
+        api_key: OpenAI API key
+        
+    Returns:
+        OpenAI client
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = _CLIENTS[api_key] = OpenAI(api_key=api_key)
+        return client
+
+# System prompt shared by every request. Kept constant and always sent first
+# so it forms an identical prefix that OpenAI's prompt caching can reuse;
+# per-request content belongs in the user message.
+_SYSTEM_PROMPT = """You are an expert marketing analytics consultant specializing in conversion funnel optimization.
+Your task is to analyze funnel data and provide actionable insights for marketing teams.
+
+Provide analysis in JSON format with the following structure:
+{
+    "summary": "Executive summary of funnel performance",
+    "recommendations": ["List of specific actionable recommendations"],
+    "priorities": ["List of optimization priorities in order of impact"],
+    "insights": {
+        "key_findings": ["Key insights from the data"],
+        "opportunities": ["Specific opportunities identified"],
+        "risks": ["Potential risks or concerns"]
+    }
+}
+
+Focus on practical, implementable recommendations that marketing teams can act on immediately.
+Respond with the JSON object only, without any surrounding text."""
+
+# Response budgets per insight mode: "macro" for full narrative analyses,
+# "micro" for short, focused diagnostics
+InsightMode = Literal["macro", "micro"]
+MODE_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "macro": {
+        "max_tokens": 800,
+        "temperature": 0.7,
+        "guidance": "Keep it concise: at most 5 recommendations, 5 priorities and 3 items per insights list, one sentence each."
+    },
+    "micro": {
+        "max_tokens": 250,
+        "temperature": 0.3,
+        "guidance": "Be brief: a one-sentence summary, at most 3 recommendations and 3 priorities, and empty insights lists."
+    }
+}
+
+# Overall conversion rate (in percent) a funnel must exceed to count as healthy,
+# both for the summary banner and for skipping the model
+HEALTHY_CONVERSION_FLOOR = 1.0
+
+# Executive summary status banners, checked in order against the overall
+# conversion rate; the last entry is the fallback
+SUMMARY_STATUS_TABLE = (
+    (HEALTHY_CONVERSION_FLOOR, "🟢 HEALTHY - Conversion rate above 1%\n"),
+    (0.5, "🟡 MODERATE - Conversion rate needs improvement\n"),
+    (float("-inf"), "🔴 CRITICAL - Conversion rate below 0.5%\n")
+)
+
+SUMMARY_NEXT_STEPS = (
+    "\nNEXT STEPS:\n"
+    "• Review detailed analysis in dashboard\n"
+    "• Implement high-priority recommendations\n"
+    "• Monitor conversion rates daily\n"
+    "• Schedule weekly funnel review meetings\n"
+)
+
+# Canned insights for funnels with no problematic stages and a healthy overall
+# conversion rate; there is nothing for the model to diagnose in that case
+_HEALTHY_INSIGHTS_TEMPLATE: Dict[str, Any] = {
+    "summary": "The funnel is healthy: every stage is within the drop-off threshold and overall conversion is above 1%.",
+    "recommendations": [
+        "Keep monitoring stage conversion rates to catch regressions early",
+        "Test incremental improvements to the highest-volume stage",
+        "Scale traffic sources that are already converting well"
+    ],
+    "priorities": [
+        "Maintain current stage performance",
+        "Grow top-of-funnel volume"
+    ],
+    "insights": {
+        "key_findings": ["No stage exceeds the drop-off threshold"],
+        "opportunities": ["Additional traffic should convert at the current healthy rates"],
+        "risks": ["Conversion rates can drift as traffic mix changes"]
+    }
+}
+
+# Outermost JSON object in a completion that has text around it
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Async clients are tied to the event loop that opened their connections,
+# so they are shared per running loop rather than per process
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+def _get_async_client(api_key: str) -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client for an API key on the running event loop
+    
+    Args:
+        api_key: OpenAI API key
+        
+    Returns:
+        AsyncOpenAI client
+    """
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return client
+
+def _load_insights(content: str) -> Dict[str, Any]:
+    """
+    Parse insights JSON from a completion
+    
+    The model is asked for bare JSON, but if it wraps the object in prose or
+    a code fence the outermost {...} block is extracted and parsed instead.
+    
+    Args:
+        content: Raw completion content
+        
+    Returns:
+        Parsed insights dictionary
+        
+    Raises:
+        ValueError: If no JSON object can be parsed from the content
+    """
+    try:
+        insights = json.loads(content)
+    except json.JSONDecodeError:
+        match = _JSON_OBJECT_RE.search(content)
+        if not match:
+            raise ValueError("No JSON object found in completion")
+        insights = json.loads(match.group(0))
+    
+    if not isinstance(insights, dict):
+        raise ValueError("Completion JSON is not an object")
+    return insights
+
+def _parse_partial_json(text: str) -> Optional[Any]:
+    """
+    Parse the complete portion of a truncated JSON document
+    
+    Anything before the first opening brace is ignored. The text is then
+    cut back to the last finished value (just before a comma or
+    after a closing bracket) and any containers still open at that point are
+    closed, so unfinished strings are dropped rather than half-rendered.
+    
+    Args:
+        text: JSON received so far
+        
+    Returns:
+        Parsed value or None if nothing complete has arrived yet
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    text = text[start:]
+    
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    safe_end = 0
+    safe_closers = ""
+    
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            safe_end, safe_closers = i + 1, "".join(reversed(stack))
+        elif ch == ",":
+            safe_end, safe_closers = i, "".join(reversed(stack))
+    
+    if not safe_end:
+        return None
+    
+    try:
+        return json.loads(text[:safe_end] + safe_closers)
+    except json.JSONDecodeError:
+        return None
+
+def _json_default(value: Any) -> Any:
+    """
+    Serialize NumPy scalars (e.g. counts read from a CSV) as plain numbers
+    
+    Args:
+        value: Object the json module cannot serialize natively
+        
+    Returns:
+        Equivalent built-in Python value
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+@functools.lru_cache(maxsize=256)
+def _render_context(results_json: str, funnel_json: str) -> str:
+    """
+    Render the prompt context from serialized analysis inputs
+    
+    Memoized so repeated renders of the same analysis (e.g. dashboard reruns)
+    reuse the previously built string.
+    
+    Args:
+        results_json: analysis_results serialized with sorted keys
+        funnel_json: Compact JSON of the raw funnel data
+        
+    Returns:
+        Formatted context string
+    """
+    analysis_results = json.loads(results_json)
+    
+    parts = [f"""
+FUNNEL PERFORMANCE ANALYSIS
+
+Raw Data:
+{funnel_json}
+
+Analysis Results:
+- Overall Conversion Rate: {analysis_results['overall_conversion']:.1f}%
+- Total Visitors: {analysis_results['total_visitors']:,}
+- Final Conversions: {analysis_results['final_conversions']:,}
+- Drop-off Threshold Used: {analysis_results['threshold_used']}%
+- Problematic Stages: {len(analysis_results['problematic_stages'])}
+
+Stage-by-Stage Performance:
+"""]
+    
+    stage_analysis = analysis_results['stage_analysis']
+    for stage, count, rate, drop in zip(stage_analysis['Stage'], stage_analysis['Count'],
+                                        stage_analysis['Conversion Rate (%)'], stage_analysis['Drop-off (%)']):
+        parts.append(f"- {stage}: {count:,} visitors, {rate:.1f}% conversion, {drop:.1f}% drop-off\n")
+    
+    if analysis_results['problematic_stages']:
+        parts.append("\nProblematic Stages Identified:\n")
+        for stage in analysis_results['problematic_stages']:
+            parts.append(f"- {stage}: Exceeds {analysis_results['threshold_used']}% drop-off threshold\n")
+    
+    if analysis_results['biggest_drop_stage']:
+        parts.append(f"\nBiggest Drop-off: {analysis_results['biggest_drop_stage']} ({analysis_results['biggest_drop_value']:.1f}%)\n")
+    
+    parts.append("\nPlease provide specific, actionable recommendations for improving conversion rates and reducing drop-offs.")
+    
+    return "".join(parts)
 
 class AIInsights:
     """
     Generates AI-powered insights and recommendations using OpenAI GPT-4
     """
     
-    def __init__(self):
+    # Completions shared by every instance, keyed by prompt hash
+    _response_cache: "OrderedDict[str, str]" = OrderedDict()
+    _response_cache_lock = threading.Lock()
+    
+    def __init__(self, cache_dir: Optional[str] = None):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = _get_sync_client(self.openai_api_key)
         else:
             self.client = None
+        
+        # Optional directory for persisting completions across restarts
+        self.cache_dir = cache_dir or os.getenv("AI_INSIGHTS_CACHE_DIR")
+        
+        # Keyword matchers used to bucket recommendations into plan sections
+        self._immediate_re = re.compile(r"immediately|urgent|asap|critical", re.IGNORECASE)
+        self._short_term_re = re.compile(r"test|optimize|improve|enhance", re.IGNORECASE)
     
     def generate_insights(self, analysis_results: Dict[str, Any], 
-                         funnel_data: Dict[str, int]) -> Optional[Dict[str, Any]]:
+                         funnel_data: Dict[str, int], 
+                         mode: InsightMode = "macro") -> Optional[Dict[str, Any]]:
         """
         Generate AI-powered insights and recommendations
         
         Args:
             analysis_results: Results from funnel analysis
             funnel_data: Raw funnel data
+            mode: "macro" for a full analysis, "micro" for a short diagnostic
             
         Returns:
             Dictionary with AI insights or None if API unavailable
         """
-        if not self.client:
-            return None
-        
         try:
+            direct = self._direct_insights(analysis_results)
+            if direct is not None:
+                return direct
+            
+            if not self.client:
+                return None
+            
             # Prepare data for AI analysis
             context = self._prepare_context(analysis_results, funnel_data)
+            prompt_hash = self._prompt_hash(context, mode)
+            
+            # Reuse a previous completion for an identical prompt
+            content = self._get_cached_response(prompt_hash)
+            if content is not None:
+                return _load_insights(content)
             
             # Generate insights using GPT-4
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert marketing analytics consultant specializing in conversion funnel optimization. 
-                        Your task is to analyze funnel data and provide actionable insights for marketing teams.
-                        
-                        Provide analysis in JSON format with the following structure:
-                        {
-                            "summary": "Executive summary of funnel performance",
-                            "recommendations": ["List of specific actionable recommendations"],
-                            "priorities": ["List of optimization priorities in order of impact"],
-                            "insights": {
-                                "key_findings": ["Key insights from the data"],
-                                "opportunities": ["Specific opportunities identified"],
-                                "risks": ["Potential risks or concerns"]
-                            }
-                        }
-                        
-                        Focus on practical, implementable recommendations that marketing teams can act on immediately."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze this funnel data and provide insights:\n\n{context}"
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=2000,
-                temperature=0.7
-            )
+            response = self.client.chat.completions.create(**self._completion_request(context, mode))
             
             # Parse and return insights
-            insights = json.loads(response.choices[0].message.content)
+            content = response.choices[0].message.content
+            insights = _load_insights(content)
+            self._store_cached_response(prompt_hash, content)
             return insights
             
         except Exception as e:
             print(f"Error generating AI insights: {e}")
             return None
     
-    def _prepare_context(self, analysis_results: Dict[str, Any], 
-                        funnel_data: Dict[str, int]) -> str:
+    def stream_insights(self, analysis_results: Dict[str, Any], 
+                        funnel_data: Dict[str, int], 
+                        mode: InsightMode = "macro") -> Iterator[Dict[str, Any]]:
         """
-        Prepare context string for AI analysis
+        Stream AI insights as the completion arrives
+        
+        Each yielded dictionary holds every field and list item received so
+        far, so callers can render recommendations one by one instead of
+        waiting for the full response. The last item yielded is the complete
+        insights dictionary, identical to what generate_insights returns.
         
         Args:
-            analysis_results: Analysis results
+            analysis_results: Results from funnel analysis
+            funnel_data: Raw funnel data
+            mode: "macro" for a full analysis, "micro" for a short diagnostic
+            
+        Yields:
+            Progressively more complete insights dictionaries
+        """
+        try:
+            direct = self._direct_insights(analysis_results)
+            if direct is not None:
+                yield direct
+                return
+            
+            if not self.client:
+                return
+            
+            context = self._prepare_context(analysis_results, funnel_data)
+            prompt_hash = self._prompt_hash(context, mode)
+            
+            content = self._get_cached_response(prompt_hash)
+            if content is not None:
+                yield _load_insights(content)
+                return
+            
+            response = self.client.chat.completions.create(stream=True, **self._completion_request(context, mode))
+            
+            chunks: List[str] = []
+            last_partial = None
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                chunks.append(delta)
+                
+                # A new complete value can only appear once a delta ends one,
+                # so skip the rescan for deltas that are pure string content
+                if not any(ch in delta for ch in ",}]"):
+                    continue
+                
+                partial = _parse_partial_json("".join(chunks))
+                if isinstance(partial, dict) and partial != last_partial:
+                    last_partial = partial
+                    yield partial
+            
+            content = "".join(chunks)
+            insights = _load_insights(content)
+            self._store_cached_response(prompt_hash, content)
+            if insights != last_partial:
+                yield insights
+            
+        except Exception as e:
+            print(f"Error generating AI insights: {e}")
+    
+    async def generate_insights_async(self, analysis_results: Dict[str, Any], 
+                                      funnel_data: Dict[str, int], 
+                                      mode: InsightMode = "macro") -> Optional[Dict[str, Any]]:
+        """
+        Asynchronous variant of generate_insights
+        
+        Args:
+            analysis_results: Results from funnel analysis
             funnel_data: Raw funnel data
+            mode: "macro" for a full analysis, "micro" for a short diagnostic
             
         Returns:
-            Formatted context string
+            Dictionary with AI insights or None if API unavailable
         """
-        context = f"""
-FUNNEL PERFORMANCE ANALYSIS
-
-Raw Data:
-{json.dumps(funnel_data, indent=2)}
-
-Analysis Results:
-- Overall Conversion Rate: {analysis_results['overall_conversion']:.1f}%
-- Total Visitors: {analysis_results['total_visitors']:,}
-- Final Conversions: {analysis_results['final_conversions']:,}
-- Drop-off Threshold Used: {analysis_results['threshold_used']}%
-- Problematic Stages: {len(analysis_results['problematic_stages'])}
-
-Stage-by-Stage Performance:
-"""
+        try:
+            direct = self._direct_insights(analysis_results)
+            if direct is not None:
+                return direct
+            
+            if not self.openai_api_key:
+                return None
+            
+            context = self._prepare_context(analysis_results, funnel_data)
+            prompt_hash = self._prompt_hash(context, mode)
+            
+            content = self._get_cached_response(prompt_hash)
+            if content is not None:
+                return _load_insights(content)
+            
+            aclient = _get_async_client(self.openai_api_key)
+            response = await aclient.chat.completions.create(**self._completion_request(context, mode))
+            
+            content = response.choices[0].message.content
+            insights = _load_insights(content)
+            self._store_cached_response(prompt_hash, content)
+            return insights
+            
+        except Exception as e:
+            print(f"Error generating AI insights: {e}")
+            return None
+    
+    async def generate_insights_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, int]]], 
+                                      concurrency: int = 20) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate insights for several funnels concurrently
+        
+        Args:
+            items: List of (analysis_results, funnel_data) pairs
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            List of insights (or None on failure) in the same order as items
+        """
+        semaphore = asyncio.Semaphore(concurrency)
         
-        for stage_data in analysis_results['stage_analysis']:
-            context += f"- {stage_data['Stage']}: {stage_data['Count']:,} visitors, {stage_data['Conversion Rate (%)']:.1f}% conversion, {stage_data['Drop-off (%)']:.1f}% drop-off\n"
+        async def _bounded(analysis_results, funnel_data):
+            async with semaphore:
+                return await self.generate_insights_async(analysis_results, funnel_data)
         
-        if analysis_results['problematic_stages']:
-            context += f"\nProblematic Stages Identified:\n"
-            for stage in analysis_results['problematic_stages']:
-                context += f"- {stage}: Exceeds {analysis_results['threshold_used']}% drop-off threshold\n"
+        return await asyncio.gather(*(_bounded(*item) for item in items))
+    
+    def generate_insights_multi(self, items: List[Tuple[Dict[str, Any], Dict[str, int]]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate insights for several funnels with a single chat completion
+        
+        The system prompt is sent once for the whole group, which saves input
+        tokens and request quota when many small funnels are analyzed together.
+        
+        Args:
+            items: List of (analysis_results, funnel_data) pairs
+            
+        Returns:
+            List of insights (or None on failure) in the same order as items
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        try:
+            results = [self._direct_insights(analysis_results) for analysis_results, _ in items]
+            if not self.client or not items:
+                return results
+            
+            pending = []
+            for i, (analysis_results, funnel_data) in enumerate(items):
+                if results[i] is not None:
+                    continue
+                context = self._prepare_context(analysis_results, funnel_data)
+                prompt_hash = self._prompt_hash(context)
+                content = self._get_cached_response(prompt_hash)
+                if content is not None:
+                    results[i] = _load_insights(content)
+                else:
+                    pending.append((i, prompt_hash, context))
+            
+            if not pending:
+                return results
+            
+            numbered = "\n\n".join(
+                f"FUNNEL {n}:\n{context}" for n, (_, _, context) in enumerate(pending, 1)
+            )
+            request = self._completion_request(numbered)
+            request["messages"][-1]["content"] = (
+                f"Analyze each of these {len(pending)} funnels separately and provide insights. "
+                'Respond with {"results": [...]} containing one analysis object per funnel, '
+                f"in the same order, using the structure described above. "
+                f"{MODE_SETTINGS['macro']['guidance']}\n\n{numbered}"
+            )
+            request["max_tokens"] = min(request["max_tokens"] * len(pending), 16000)
+            
+            response = self.client.chat.completions.create(**request)
+            analyses = _load_insights(response.choices[0].message.content).get("results", [])
+            
+            for (i, prompt_hash, _), insights in zip(pending, analyses):
+                if isinstance(insights, dict):
+                    results[i] = insights
+                    self._store_cached_response(prompt_hash, json.dumps(insights))
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error generating AI insights: {e}")
+            return results
+    
+    def submit_insights_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, int]]]) -> Optional[str]:
+        """
+        Submit insight requests for several funnels to the OpenAI Batch API
+        
+        Batch jobs complete within 24 hours at a reduced token price, which
+        suits offline or scheduled reports that do not need instant results.
+        
+        Args:
+            items: List of (analysis_results, funnel_data) pairs
+            
+        Returns:
+            Batch ID to pass to wait_for_batch, or None if submission failed
+        """
+        if not self.client:
+            return None
+        
+        try:
+            lines = []
+            for i, (analysis_results, funnel_data) in enumerate(items):
+                context = self._prepare_context(analysis_results, funnel_data)
+                lines.append(json.dumps({
+                    "custom_id": f"{i}-{self._prompt_hash(context)}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._completion_request(context)
+                }))
+            
+            batch_file = self.client.files.create(
+                file=("funnel_insights_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            return batch.id
+            
+        except Exception as e:
+            print(f"Error submitting AI insights batch: {e}")
+            return None
+    
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 30.0, 
+                       timeout: Optional[float] = None) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """
+        Wait for a batch submitted with submit_insights_batch and collect its insights
+        
+        Args:
+            batch_id: ID returned by submit_insights_batch
+            poll_interval: Seconds between status checks
+            timeout: Maximum seconds to wait, or None to wait until the batch ends
+            
+        Returns:
+            List of insights (or None per failed item) in submission order,
+            or None if the batch did not complete
+        """
+        if not self.client:
+            return None
+        
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            batch = self.client.batches.retrieve(batch_id)
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if deadline is not None and time.monotonic() >= deadline:
+                    print(f"Timed out waiting for AI insights batch {batch_id}")
+                    return None
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch_id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                print(f"AI insights batch {batch_id} ended with status {batch.status}")
+                return None
+            
+            output = self.client.files.content(batch.output_file_id).text
+            parsed: Dict[int, Dict[str, Any]] = {}
+            
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                index, prompt_hash = record["custom_id"].split("-", 1)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                
+                content = response["body"]["choices"][0]["message"]["content"]
+                try:
+                    parsed[int(index)] = _load_insights(content)
+                except ValueError:
+                    continue
+                self._store_cached_response(prompt_hash, content)
+            
+            total = max(batch.request_counts.total if batch.request_counts else 0,
+                        max(parsed, default=-1) + 1)
+            return [parsed.get(i) for i in range(total)]
+            
+        except Exception as e:
+            print(f"Error retrieving AI insights batch: {e}")
+            return None
+    
+    @staticmethod
+    def _direct_insights(analysis_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Answer trivially healthy funnels without calling the model
+        
+        Args:
+            analysis_results: Results from funnel analysis
+            
+        Returns:
+            Canned healthy insights, or None if the funnel needs AI analysis
+        """
+        if (not analysis_results['problematic_stages']
+                and analysis_results['overall_conversion'] > HEALTHY_CONVERSION_FLOOR):
+            return copy.deepcopy(_HEALTHY_INSIGHTS_TEMPLATE)
+        return None
+    
+    def _completion_request(self, context: str, mode: InsightMode = "macro") -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for a context string
+        
+        Args:
+            context: Formatted context string
+            mode: Key into MODE_SETTINGS selecting the response budget
+            
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        settings = MODE_SETTINGS[mode]
+        return {
+            "model": "gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+            "messages": [
+                {
+                    "role": "system",
+                    "content": _SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"Analyze this funnel data and provide insights. {settings['guidance']}\n\n{context}"
+                }
+            ],
+            "max_tokens": settings["max_tokens"],
+            "temperature": settings["temperature"]
+        }
+    
+    @staticmethod
+    def _prompt_hash(context: str, mode: InsightMode = "macro") -> str:
+        """
+        Build a stable cache key for a rendered prompt
+        
+        Args:
+            context: Context string sent to the model
+            mode: Insight mode the completion was generated with
+            
+        Returns:
+            Hex digest identifying the prompt
+        """
+        return hashlib.blake2b(f"{mode}\n{context}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cache_path(self, prompt_hash: str) -> Optional[str]:
+        """
+        Get the on-disk location of a cached completion
+        
+        Args:
+            prompt_hash: Key produced by _prompt_hash
+            
+        Returns:
+            File path or None if disk caching is disabled
+        """
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{prompt_hash}.json")
+    
+    def _get_cached_response(self, prompt_hash: str) -> Optional[str]:
+        """
+        Look up a completion in the memory cache, then on disk
+        
+        Args:
+            prompt_hash: Key produced by _prompt_hash
+            
+        Returns:
+            Raw completion content or None on a cache miss
+        """
+        cache = AIInsights._response_cache
+        with AIInsights._response_cache_lock:
+            if prompt_hash in cache:
+                cache.move_to_end(prompt_hash)
+                return cache[prompt_hash]
         
-        if analysis_results['biggest_drop_stage']:
-            context += f"\nBiggest Drop-off: {analysis_results['biggest_drop_stage']} ({analysis_results['biggest_drop_value']:.1f}%)\n"
+        path = self._cache_path(prompt_hash)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except OSError:
+                return None
+            self._remember_response(prompt_hash, content)
+            return content
+        
+        return None
+    
+    def _store_cached_response(self, prompt_hash: str, content: str) -> None:
+        """
+        Save a completion in the memory cache and, if enabled, on disk
+        
+        Args:
+            prompt_hash: Key produced by _prompt_hash
+            content: Raw completion content
+        """
+        self._remember_response(prompt_hash, content)
+        
+        path = self._cache_path(prompt_hash)
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
+            except OSError as e:
+                print(f"Error writing AI insights cache: {e}")
+    
+    @staticmethod
+    def _remember_response(prompt_hash: str, content: str) -> None:
+        """
+        Insert a completion into the bounded in-memory cache
         
-        context += "\nPlease provide specific, actionable recommendations for improving conversion rates and reducing drop-offs."
+        Args:
+            prompt_hash: Key produced by _prompt_hash
+            content: Raw completion content
+        """
+        cache = AIInsights._response_cache
+        with AIInsights._response_cache_lock:
+            cache[prompt_hash] = content
+            cache.move_to_end(prompt_hash)
+            while len(cache) > RESPONSE_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    def _prepare_context(self, analysis_results: Dict[str, Any], 
+                        funnel_data: Dict[str, int]) -> str:
+        """
+        Prepare context string for AI analysis
         
-        return context
+        Args:
+            analysis_results: Analysis results
+            funnel_data: Raw funnel data
+            
+        Returns:
+            Formatted context string
+        """
+        # Canonical JSON makes the memoization key independent of dict
+        # insertion order in analysis_results; funnel_data keeps its order
+        # because it is rendered verbatim as the raw stage counts
+        return _render_context(
+            json.dumps(analysis_results, sort_keys=True, default=_json_default),
+            json.dumps(funnel_data, separators=(",", ":"), default=_json_default)
+        )
     
     def generate_optimization_plan(self, insights: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -142,9 +814,9 @@ Stage-by-Stage Performance:
         recommendations = insights.get('recommendations', [])
         
         for rec in recommendations:
-            if any(keyword in rec.lower() for keyword in ['immediately', 'urgent', 'asap', 'critical']):
+            if self._immediate_re.search(rec):
                 plan["immediate_actions"].append(rec)
-            elif any(keyword in rec.lower() for keyword in ['test', 'optimize', 'improve', 'enhance']):
+            elif self._short_term_re.search(rec):
                 plan["short_term_goals"].append(rec)
             else:
                 plan["long_term_strategy"].append(rec)
@@ -172,39 +844,33 @@ Stage-by-Stage Performance:
         Returns:
             Executive summary string
         """
-        summary = f"""
+        overall_conversion = analysis_results['overall_conversion']
+        parts = [f"""
 FUNNEL PERFORMANCE EXECUTIVE SUMMARY
 
 OVERVIEW:
 • Total Visitors: {analysis_results['total_visitors']:,}
 • Final Conversions: {analysis_results['final_conversions']:,}
-• Overall Conversion Rate: {analysis_results['overall_conversion']:.1f}%
+• Overall Conversion Rate: {overall_conversion:.1f}%
 • Issues Identified: {len(analysis_results['problematic_stages'])} problematic stages
 
 PERFORMANCE STATUS:
-"""
+"""]
         
-        if analysis_results['overall_conversion'] > 1.0:
-            summary += "🟢 HEALTHY - Conversion rate above 1%\n"
-        elif analysis_results['overall_conversion'] > 0.5:
-            summary += "🟡 MODERATE - Conversion rate needs improvement\n"
-        else:
-            summary += "🔴 CRITICAL - Conversion rate below 0.5%\n"
+        parts.append(next(
+            (status for floor, status in SUMMARY_STATUS_TABLE if overall_conversion > floor),
+            SUMMARY_STATUS_TABLE[-1][1]
+        ))
         
         if analysis_results['problematic_stages']:
-            summary += f"\nCRITICAL ISSUES:\n"
-            for stage in analysis_results['problematic_stages']:
-                summary += f"• {stage} stage showing excessive drop-off\n"
+            parts.append("\nCRITICAL ISSUES:\n")
+            parts.extend(f"• {stage} stage showing excessive drop-off\n"
+                         for stage in analysis_results['problematic_stages'])
         
         if insights and 'recommendations' in insights:
-            summary += f"\nTOP RECOMMENDATIONS:\n"
-            for i, rec in enumerate(insights['recommendations'][:3], 1):
-                summary += f"{i}. {rec}\n"
+            parts.append("\nTOP RECOMMENDATIONS:\n")
+            parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(insights['recommendations'][:3], 1))
         
-        summary += f"\nNEXT STEPS:\n"
-        summary += "• Review detailed analysis in dashboard\n"
-        summary += "• Implement high-priority recommendations\n"
-        summary += "• Monitor conversion rates daily\n"
-        summary += "• Schedule weekly funnel review meetings\n"
+        parts.append(SUMMARY_NEXT_STEPS)
         
-        return summary
+        return "".join(parts)
@@ -1,8 +1,84 @@
+import asyncio
+import math
 import requests
 import json
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Any
 import pandas as pd
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Funnel stages every integration must return
+REQUIRED_STAGES = frozenset(('Visitor', 'Lead', 'MQL', 'SQL'))
+
+# Response content types parsed line by line as newline-delimited JSON
+NDJSON_CONTENT_TYPES = frozenset(('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines'))
+
+def _build_session() -> requests.Session:
+    """
+    Build the HTTP session shared by all integrations
+    
+    Pooled keep-alive connections avoid a new TCP/TLS handshake per request,
+    and transient rate-limit/server errors are retried with backoff.
+    
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=100,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_session = _build_session()
+
+# Setup requirements per platform, read-only so the shared table can't be mutated
+_INTEGRATION_REQUIREMENTS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    'Google Ads': MappingProxyType({
+        'required_fields': ('customer_id', 'developer_token', 'client_id', 'client_secret', 'refresh_token'),
+        'documentation': 'https://developers.google.com/google-ads/api/docs/first-call/overview',
+        'setup_steps': (
+            'Create Google Ads API developer account',
+            'Generate developer token',
+            'Set up OAuth 2.0 credentials',
+            'Obtain customer ID from Google Ads account'
+        )
+    }),
+    'HubSpot': MappingProxyType({
+        'required_fields': ('api_token',),
+        'documentation': 'https://developers.hubspot.com/docs/api/overview',
+        'setup_steps': (
+            'Create HubSpot developer account',
+            'Generate private app access token',
+            'Configure required scopes for CRM access'
+        )
+    }),
+    'Salesforce': MappingProxyType({
+        'required_fields': ('username', 'password', 'security_token'),
+        'documentation': 'https://developer.salesforce.com/docs/api-explorer/sobject/Lead',
+        'setup_steps': (
+            'Enable API access in Salesforce org',
+            'Generate security token',
+            'Configure connected app (recommended)'
+        )
+    }),
+    'Custom API': MappingProxyType({
+        'required_fields': ('api_url', 'api_key'),
+        'documentation': 'Contact support for custom API integration',
+        'setup_steps': (
+            'Provide API endpoint URL',
+            'Provide authentication method',
+            'Specify data format and structure'
+        )
+    })
+})
+
+_EMPTY_REQUIREMENTS: Mapping[str, Any] = MappingProxyType({})
 
 class APIIntegrations:
     """
@@ -101,11 +177,11 @@ class APIIntegrations:
             
             # Example: Get contacts count (visitors)
             contacts_url = f"{base_url}/crm/v3/objects/contacts"
-            # visitors_response = requests.get(contacts_url, headers=headers)
+            # visitors_response = _session.get(contacts_url, headers=headers, timeout=30)
             
             # Example: Get deals count (leads/opportunities)
             deals_url = f"{base_url}/crm/v3/objects/deals"
-            # deals_response = requests.get(deals_url, headers=headers)
+            # deals_response = _session.get(deals_url, headers=headers, timeout=30)
             
             return {
                 "error": "HubSpot API integration requires additional setup",
@@ -145,6 +221,31 @@ class APIIntegrations:
         except Exception as e:
             return {"error": f"Salesforce integration failed: {str(e)}"}
     
+    async def fetch_platforms_async(self, credentials: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Fetch funnel data from several platforms concurrently
+        
+        The integrations are blocking, so each one runs in a worker thread.
+        
+        Args:
+            credentials: Keyword arguments for each platform's integration,
+                keyed by platform name ('Google Ads', 'HubSpot' or 'Salesforce')
+            
+        Returns:
+            Dictionary with each platform's result, keyed by platform name
+        """
+        integrations = {
+            'Google Ads': self.google_ads_integration,
+            'HubSpot': self.hubspot_integration,
+            'Salesforce': self.salesforce_integration
+        }
+        
+        platforms = [platform for platform in credentials if platform in integrations]
+        results = await asyncio.gather(
+            *(asyncio.to_thread(integrations[platform], **credentials[platform]) for platform in platforms)
+        )
+        return dict(zip(platforms, results))
+    
     def custom_api_integration(self, api_url: str, api_key: str, 
                              headers: Dict[str, str] = None) -> Optional[Dict[str, int]]:
         """
@@ -171,12 +272,17 @@ class APIIntegrations:
             if headers:
                 request_headers.update(headers)
             
-            # Make API request
-            response = requests.get(api_url, headers=request_headers, timeout=30)
-            response.raise_for_status()
-            
-            # Parse response
-            data = response.json()
+            # Make API request, streaming so NDJSON exports are parsed line by
+            # line instead of being buffered whole
+            with _session.get(api_url, headers=request_headers, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                
+                # Parse response
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type in NDJSON_CONTENT_TYPES:
+                    data = self._sum_ndjson_records(response.iter_lines())
+                else:
+                    data = response.json()
             
             # Transform data to funnel format
             # This is a generic example - real implementation would need
@@ -198,6 +304,30 @@ class APIIntegrations:
         except Exception as e:
             return {"error": f"Custom API integration failed: {str(e)}"}
     
+    def _sum_ndjson_records(self, lines: Iterable[bytes]) -> Dict[str, int]:
+        """
+        Aggregate newline-delimited JSON records into funnel stage totals
+        
+        Each line is one JSON object holding counts for some or all stages
+        (e.g. one record per day or campaign); counts are summed per stage.
+        
+        Args:
+            lines: Raw response lines
+            
+        Returns:
+            Dictionary with summed counts for every stage seen
+        """
+        totals: Dict[str, int] = {}
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                continue
+            for stage in REQUIRED_STAGES.intersection(record):
+                totals[stage] = totals.get(stage, 0) + int(record[stage])
+        return totals
+    
     def validate_funnel_data(self, data: Dict[str, int]) -> bool:
         """
         Validate that funnel data has the required structure
@@ -208,26 +338,21 @@ class APIIntegrations:
         Returns:
             True if data is valid, False otherwise
         """
-        required_stages = ['Visitor', 'Lead', 'MQL', 'SQL']
-        
         if not isinstance(data, dict):
             return False
             
         # Check if all required stages are present
-        if not all(stage in data for stage in required_stages):
+        if not REQUIRED_STAGES.issubset(data):
             return False
             
-        # Check if all values are positive integers
-        try:
-            for stage, count in data.items():
-                if not isinstance(count, (int, float)) or count < 0:
-                    return False
-        except (TypeError, ValueError):
-            return False
-            
-        return True
+        # Check if all values are finite, non-negative numbers
+        return all(
+            isinstance(count, (int, float)) and count >= 0
+            and (isinstance(count, int) or math.isfinite(count))
+            for count in data.values()
+        )
     
-    def get_integration_requirements(self, platform: str) -> Dict[str, Any]:
+    def get_integration_requirements(self, platform: str) -> Mapping[str, Any]:
         """
         Get requirements for specific platform integration
         
@@ -235,46 +360,6 @@ class APIIntegrations:
             platform: Platform name
             
         Returns:
-            Dictionary with integration requirements
+            Read-only mapping with integration requirements
         """
-        requirements = {
-            'Google Ads': {
-                'required_fields': ['customer_id', 'developer_token', 'client_id', 'client_secret', 'refresh_token'],
-                'documentation': 'https://developers.google.com/google-ads/api/docs/first-call/overview',
-                'setup_steps': [
-                    'Create Google Ads API developer account',
-                    'Generate developer token',
-                    'Set up OAuth 2.0 credentials',
-                    'Obtain customer ID from Google Ads account'
-                ]
-            },
-            'HubSpot': {
-                'required_fields': ['api_token'],
-                'documentation': 'https://developers.hubspot.com/docs/api/overview',
-                'setup_steps': [
-                    'Create HubSpot developer account',
-                    'Generate private app access token',
-                    'Configure required scopes for CRM access'
-                ]
-            },
-            'Salesforce': {
-                'required_fields': ['username', 'password', 'security_token'],
-                'documentation': 'https://developer.salesforce.com/docs/api-explorer/sobject/Lead',
-                'setup_steps': [
-                    'Enable API access in Salesforce org',
-                    'Generate security token',
-                    'Configure connected app (recommended)'
-                ]
-            },
-            'Custom API': {
-                'required_fields': ['api_url', 'api_key'],
-                'documentation': 'Contact support for custom API integration',
-                'setup_steps': [
-                    'Provide API endpoint URL',
-                    'Provide authentication method',
-                    'Specify data format and structure'
-                ]
-            }
-        }
-        
-        return requirements.get(platform, {})
\ No newline at end of file
+        return _INTEGRATION_REQUIREMENTS.get(platform, _EMPTY_REQUIREMENTS)
\ No newline at end of file
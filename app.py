@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
 from datetime import datetime, timedelta
 import json
-from funnel_analyzer import FunnelAnalyzer
-from data_generator import DataGenerator
-from ai_insights import AIInsights
+import csv
+import io
+import zlib
+from report_generator import build_export_strings
 
 # Page configuration
 st.set_page_config(
@@ -15,15 +15,159 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize components
+# Components are lazy singletons: each is built on first use and shared across
+# sessions, so a session that never asks for insights never imports openai.
 @st.cache_resource
-def initialize_components():
-    data_gen = DataGenerator()
-    analyzer = FunnelAnalyzer()
-    ai_insights = AIInsights()
-    return data_gen, analyzer, ai_insights
+def get_datagen():
+    from data_generator import DataGenerator
+    return DataGenerator()
 
-data_generator, funnel_analyzer, ai_insights = initialize_components()
+@st.cache_resource
+def get_analyzer():
+    from funnel_analyzer import FunnelAnalyzer
+    return FunnelAnalyzer()
+
+@st.cache_resource
+def get_ai():
+    from ai_insights import AIInsights
+    return AIInsights()
+
+# Cached analysis steps, keyed on the ordered (stage, count) items
+CACHE_TTL = 24 * 60 * 60
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_analyze(funnel_items, threshold):
+    return get_analyzer().analyze_funnel(dict(funnel_items), threshold)
+
+class InsightsUnavailable(Exception):
+    """Raised by cached_insights so st.cache_data never stores a failed generation"""
+
+# One LLM call per input set; failures raise instead of being cached, so they
+# are retried on the next rerun, and the TTL refreshes stale insights
+@st.cache_data(ttl=3600, show_spinner="Generating AI insights...")
+def cached_insights(funnel_items, threshold):
+    insights = get_ai().generate_insights(cached_analyze(funnel_items, threshold), dict(funnel_items))
+    if not insights:
+        raise InsightsUnavailable()
+    return insights
+
+# Insights are serialized with the stdlib encoder when they are generated and
+# kept in session state; the fallback payload is a constant
+NO_INSIGHTS_JSON = json.dumps({"error": "No insights available"}, indent=2)
+
+# Demo funnels seeded from the selections, persisted to disk across restarts
+@st.cache_data(persist="disk", max_entries=64, show_spinner=False)
+def cached_demo_data(time_period, traffic_sources):
+    seed = zlib.crc32(repr((time_period, traffic_sources)).encode())
+    return get_datagen().generate_funnel_data(
+        time_period=time_period,
+        traffic_sources=list(traffic_sources),
+        seed=seed
+    )
+
+# Export payloads and notification previews, built once per analysis rather
+# than on every rerun. stage_analysis arrives as a tuple of
+# (column, values-tuple) pairs.
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_export_strings(stage_analysis_items, insights_json, report_inputs):
+    return build_export_strings(dict(stage_analysis_items), insights_json, **report_inputs)
+
+# Low-to-high conversion colors for the rate bars
+CONVERSION_COLOR_SCALE = ['#FF6B6B', '#FFE66D', '#4ECDC4']
+
+def interpolate_colors(values, scale):
+    """Map values onto an evenly spaced hex color scale, min to max like Plotly's continuous scales"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return []
+    
+    span = values.max() - values.min()
+    positions = (values - values.min()) / span if span > 0 else np.zeros_like(values)
+    stops = np.linspace(0.0, 1.0, len(scale))
+    rgb = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in scale], dtype=np.float64)
+    channels = np.rint(np.column_stack([np.interp(positions, stops, rgb[:, c]) for c in range(3)])).astype(int)
+    return [f"#{r:02X}{g:02X}{b:02X}" for r, g, b in channels]
+
+def funnel_colors(stages, problematic_stages):
+    """Red for problematic stages, teal for healthy ones"""
+    problematic = set(problematic_stages)
+    return ['#FF6B6B' if stage in problematic else '#4ECDC4' for stage in stages]
+
+# Cached figure builders, built from unvalidated dict specs
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_funnel_fig(stages, values, problematic_stages):
+    import plotly.graph_objects as go
+    
+    fig_funnel = go.Figure(
+        data=[{
+            'type': 'funnel',
+            'y': list(stages),
+            'x': list(values),
+            'textinfo': "value+percent initial",
+            'marker': {'color': funnel_colors(stages, problematic_stages)},
+            'hovertemplate': '<b>%{y}</b><br>Count: %{x}<br>Conversion: %{percentInitial}<extra></extra>'
+        }],
+        layout={
+            'title': {'text': "Conversion Funnel with Drop-off Highlights"},
+            'height': 500,
+            'showlegend': False
+        },
+        _validate=False
+    )
+    
+    return fig_funnel
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_conversion_fig(stages, conversion_rates):
+    import plotly.graph_objects as go
+    
+    fig_conversion = go.Figure(
+        data=[{
+            'type': 'bar',
+            'x': list(stages),
+            'y': list(conversion_rates),
+            'marker': {'color': interpolate_colors(conversion_rates, CONVERSION_COLOR_SCALE)},
+            'hovertemplate': 'Stage=%{x}<br>Conversion Rate=%{y}<extra></extra>'
+        }],
+        layout={
+            'title': {'text': "Conversion Rates Between Stages"},
+            'xaxis': {'title': {'text': "Stage"}},
+            'yaxis': {'title': {'text': "Conversion Rate"}},
+            'height': 400
+        },
+        _validate=False
+    )
+    return fig_conversion
+
+# The landing-page sample never changes, so one Figure is shared per process
+@st.cache_resource(show_spinner=False)
+def build_sample_fig():
+    import plotly.graph_objects as go
+    
+    sample_data = {
+        'Visitor': 1000,
+        'Lead': 500,
+        'MQL': 250,
+        'SQL': 100
+    }
+    
+    fig_sample = go.Figure(
+        data=[{
+            'type': 'funnel',
+            'y': list(sample_data.keys()),
+            'x': list(sample_data.values()),
+            'textinfo': "value+percent initial",
+            'marker': {'color': ['#4ECDC4', '#4ECDC4', '#FFE66D', '#FF6B6B']}
+        }],
+        layout={
+            'title': {'text': "Sample Funnel Analysis (Demo Data)"},
+            'height': 400,
+            'showlegend': False
+        },
+        _validate=False
+    )
+    
+    return fig_sample
 
 # Main title and description
 st.title("📊 Funnel Drop-Offs Analyzer - Trisha")
@@ -63,44 +207,50 @@ traffic_source = ["Google Ads", "Facebook Ads"]
 if data_input_method == "Manual Entry":
     st.sidebar.subheader("📝 Enter Your Data")
     
-    visitor_count = st.sidebar.number_input(
-        "Visitors",
-        min_value=1,
-        value=1000,
-        help="Total number of visitors"
-    )
-    
-    lead_count = st.sidebar.number_input(
-        "Leads",
-        min_value=1,
-        value=250,
-        max_value=visitor_count,
-        help="Number of leads generated"
-    )
-    
-    mql_count = st.sidebar.number_input(
-        "MQLs (Marketing Qualified Leads)",
-        min_value=1,
-        value=125,
-        max_value=lead_count,
-        help="Number of marketing qualified leads"
-    )
-    
-    sql_count = st.sidebar.number_input(
-        "SQLs (Sales Qualified Leads)",
-        min_value=1,
-        value=50,
-        max_value=mql_count,
-        help="Number of sales qualified leads"
-    )
-    
-    # Store manual data
-    manual_funnel_data = {
-        'Visitor': visitor_count,
-        'Lead': lead_count,
-        'MQL': mql_count,
-        'SQL': sql_count
-    }
+    # Inputs live in a form so typing doesn't rerun the script; values are
+    # submitted together and the stage ordering is checked afterwards
+    with st.sidebar.form("manual_entry", clear_on_submit=False):
+        visitor_count = st.number_input(
+            "Visitors",
+            min_value=1,
+            value=1000,
+            help="Total number of visitors"
+        )
+        
+        lead_count = st.number_input(
+            "Leads",
+            min_value=1,
+            value=250,
+            help="Number of leads generated"
+        )
+        
+        mql_count = st.number_input(
+            "MQLs (Marketing Qualified Leads)",
+            min_value=1,
+            value=125,
+            help="Number of marketing qualified leads"
+        )
+        
+        sql_count = st.number_input(
+            "SQLs (Sales Qualified Leads)",
+            min_value=1,
+            value=50,
+            help="Number of sales qualified leads"
+        )
+        
+        st.form_submit_button("Apply", use_container_width=True)
+    
+    if visitor_count >= lead_count >= mql_count >= sql_count:
+        # Store manual data
+        manual_funnel_data = {
+            'Visitor': visitor_count,
+            'Lead': lead_count,
+            'MQL': mql_count,
+            'SQL': sql_count
+        }
+    else:
+        st.sidebar.error("Each stage count must not exceed the previous stage")
+        manual_funnel_data = None
 
 elif data_input_method == "CSV Upload":
     st.sidebar.subheader("📁 Upload CSV File")
@@ -128,12 +278,22 @@ SQL,50"""
     
     if uploaded_file:
         try:
-            csv_data = pd.read_csv(uploaded_file)
-            if 'Stage' in csv_data.columns and 'Count' in csv_data.columns:
-                csv_funnel_data = dict(zip(csv_data['Stage'], csv_data['Count']))
-                st.sidebar.success("CSV uploaded successfully!")
-                st.sidebar.write("Data preview:")
-                st.sidebar.dataframe(csv_data)
+            # Two-column funnel files are tiny, so parse the bytes with the
+            # csv module and skip the pandas reader entirely
+            text = io.StringIO(uploaded_file.getvalue().decode('utf-8-sig'), newline='')
+            reader = csv.reader(text)
+            header = next(reader, [])
+            if 'Stage' in header and 'Count' in header:
+                stage_idx, count_idx = header.index('Stage'), header.index('Count')
+                # Spreadsheet exports often write counts as floats (e.g. 1000.0)
+                csv_funnel_data = {row[stage_idx]: int(float(row[count_idx])) for row in reader if row}
+                if any(count <= 0 for count in csv_funnel_data.values()):
+                    st.sidebar.error("All counts must be greater than 0")
+                    csv_funnel_data = None
+                else:
+                    st.sidebar.success("CSV uploaded successfully!")
+                    st.sidebar.write("Data preview:")
+                    st.sidebar.dataframe(pd.DataFrame(list(csv_funnel_data.items()), columns=['Stage', 'Count']))
             else:
                 st.sidebar.error("CSV must have 'Stage' and 'Count' columns")
                 csv_funnel_data = None
@@ -193,18 +353,6 @@ else:  # Demo Data
 
 st.sidebar.markdown("---")
 
-# Drop-off threshold slider
-threshold = st.sidebar.slider(
-    "Drop-off Alert Threshold (%)",
-    min_value=30,
-    max_value=40,
-    value=35,
-    step=1,
-    help="Flag stages where conversion drops by more than this percentage"
-)
-
-st.sidebar.markdown("---")
-
 # Run Analysis button
 analyze_button_enabled = True
 button_help = "Click to analyze your funnel data"
@@ -212,6 +360,9 @@ button_help = "Click to analyze your funnel data"
 # Check if we have data to analyze
 if data_input_method == "Manual Entry":
     funnel_data_ready = manual_funnel_data
+    if not manual_funnel_data:
+        analyze_button_enabled = False
+        button_help = "Please fix the funnel counts first"
 elif data_input_method == "CSV Upload":
     funnel_data_ready = csv_funnel_data
     if not csv_funnel_data:
@@ -233,32 +384,66 @@ if st.sidebar.button("🚀 Run Analysis", type="primary", use_container_width=Tr
             funnel_data = csv_funnel_data
         elif data_input_method == "Demo Data":
             # Generate mock data based on selections
-            funnel_data = data_generator.generate_funnel_data(
-                time_period=time_period,
-                traffic_sources=traffic_source
-            )
+            funnel_data = cached_demo_data(time_period, tuple(sorted(traffic_source)))
         else:
             st.error("Selected data input method not yet supported")
             funnel_data = None
         
         if funnel_data:
+            # Drop results from the previous data set so they aren't kept around
+            if funnel_data != st.session_state.get('funnel_data'):
+                for key in ('analysis_results', 'analysis_key', 'insights', 'insights_json', 'insight_key',
+                            'fig_funnel', 'fig_funnel_key', 'fig_funnel_problems'):
+                    st.session_state.pop(key, None)
+            
             # Store in session state
             st.session_state.funnel_data = funnel_data
-            st.session_state.threshold = threshold
             st.session_state.analysis_complete = True
             st.session_state.timestamp = datetime.now()
             st.session_state.data_input_method = data_input_method
 
-# Check if analysis has been run
-if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_complete:
+# Results dashboard. Running as a fragment means interactions inside it
+# (threshold slider, expanders, downloads) rerun only this function instead
+# of the whole script, sidebar and data input included.
+@st.fragment
+def render_results(time_period, traffic_source):
     funnel_data = st.session_state.funnel_data
-    threshold = st.session_state.threshold
     
-    # Analyze the funnel
-    analysis_results = funnel_analyzer.analyze_funnel(funnel_data, threshold)
+    # Format the analysis timestamp once; reports and the banner share it
+    analysis_ts = st.session_state.timestamp
+    stamp_iso = analysis_ts.strftime('%Y-%m-%d %H:%M:%S')
+    stamp_date = analysis_ts.strftime('%Y-%m-%d')
     
     # Display timestamp
-    st.success(f"✅ Analysis completed at {st.session_state.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+    st.success(f"✅ Analysis completed at {stamp_iso}")
+    
+    # Drop-off threshold slider
+    threshold = st.slider(
+        "Drop-off Alert Threshold (%)",
+        min_value=30,
+        max_value=40,
+        value=35,
+        step=1,
+        key="threshold",
+        help="Flag stages where conversion drops by more than this percentage"
+    )
+    
+    # Analyze the funnel
+    funnel_items = tuple(funnel_data.items())
+    analysis_key = (funnel_items, threshold)
+    if st.session_state.get('analysis_key') == analysis_key:
+        analysis_results = st.session_state.analysis_results
+    else:
+        analysis_results = cached_analyze(funnel_items, threshold)
+        st.session_state.analysis_key = analysis_key
+        st.session_state.analysis_results = analysis_results
+    
+    # Stage views and headline numbers, built once and shared by every block
+    stages = tuple(funnel_data.keys())
+    values = tuple(funnel_data.values())
+    first_count, last_count = values[0], values[-1]
+    overall_conversion = (last_count / first_count) * 100
+    problematic_stages = tuple(analysis_results['problematic_stages'])
     
     # Main dashboard
     col1, col2 = st.columns([2, 1])
@@ -266,40 +451,23 @@ if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_
     with col1:
         st.subheader("📈 Funnel Performance Overview")
         
-        # Funnel visualization
-        fig_funnel = go.Figure()
-        
-        stages = list(funnel_data.keys())
-        values = list(funnel_data.values())
-        colors = []
-        
-        for i, stage in enumerate(stages):
-            if stage in analysis_results['problematic_stages']:
-                colors.append('#FF6B6B')  # Red for problematic stages
-            else:
-                colors.append('#4ECDC4')  # Teal for healthy stages
-        
-        fig_funnel.add_trace(go.Funnel(
-            y=stages,
-            x=values,
-            textinfo="value+percent initial",
-            marker=dict(color=colors),
-            hovertemplate='<b>%{y}</b><br>Count: %{x}<br>Conversion: %{percentInitial}<extra></extra>'
-        ))
-        
-        fig_funnel.update_layout(
-            title="Conversion Funnel with Drop-off Highlights",
-            height=500,
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig_funnel, use_container_width=True)
+        # Funnel visualization. The figure is kept in session state per data
+        # set; a threshold change only recolors its bars, and the stable key
+        # lets the chart update in place rather than being re-created
+        if st.session_state.get('fig_funnel_key') != (stages, values):
+            st.session_state.fig_funnel = build_funnel_fig(stages, values, problematic_stages)
+            st.session_state.fig_funnel_key = (stages, values)
+            st.session_state.fig_funnel_problems = problematic_stages
+        elif st.session_state.fig_funnel_problems != problematic_stages:
+            st.session_state.fig_funnel.data[0].marker.color = funnel_colors(stages, problematic_stages)
+            st.session_state.fig_funnel_problems = problematic_stages
+        fig_funnel = st.session_state.fig_funnel
+        st.plotly_chart(fig_funnel, use_container_width=True, config={'displaylogo': False}, key="funnel_chart")
     
     with col2:
         st.subheader("🎯 Key Metrics")
         
         # Overall conversion rate
-        overall_conversion = (values[-1] / values[0]) * 100
         st.metric(
             "Overall Conversion Rate",
             f"{overall_conversion:.1f}%",
@@ -307,13 +475,13 @@ if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_
         )
         
         # Total visitors
-        st.metric("Total Visitors", f"{values[0]:,}")
+        st.metric("Total Visitors", f"{first_count:,}")
         
         # Final conversions
-        st.metric("Final Conversions (SQL)", f"{values[-1]:,}")
+        st.metric("Final Conversions (SQL)", f"{last_count:,}")
         
         # Problematic stages count
-        problematic_count = len(analysis_results['problematic_stages'])
+        problematic_count = len(problematic_stages)
         st.metric(
             "Problematic Stages",
             problematic_count,
@@ -326,63 +494,81 @@ if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_
     # Create detailed DataFrame
     detailed_df = pd.DataFrame(analysis_results['stage_analysis'])
     
-    # Color code problematic rows
-    def color_problematic_rows(row):
-        if row['Stage'] in analysis_results['problematic_stages']:
-            return ['background-color: #FFE5E5'] * len(row)
-        return [''] * len(row)
-    
-    styled_df = detailed_df.style.apply(color_problematic_rows, axis=1)
+    # Highlight problematic stages on the Stage column only
+    stage_css = pd.DataFrame(
+        {'Stage': np.where(detailed_df['Stage'].isin(problematic_stages), 'background-color: #FFE5E5', '')},
+        index=detailed_df.index
+    )
+    styled_df = detailed_df.style.apply(lambda _: stage_css, axis=None, subset=['Stage'])
     st.dataframe(styled_df, use_container_width=True)
     
     # Conversion rate chart
     st.subheader("📉 Conversion Rate by Stage")
     
-    conversion_df = pd.DataFrame({
-        'Stage': stages[1:],  # Skip first stage as it's the baseline
-        'Conversion Rate': [analysis_results['stage_analysis'][i]['Conversion Rate (%)'] for i in range(1, len(stages))]
-    })
-    
-    fig_conversion = px.bar(
-        conversion_df,
-        x='Stage',
-        y='Conversion Rate',
-        title="Conversion Rates Between Stages",
-        color='Conversion Rate',
-        color_continuous_scale=['#FF6B6B', '#FFE66D', '#4ECDC4']
+    # Stage-to-stage rates straight from the analyzer's table column
+    fig_conversion = build_conversion_fig(
+        stages[1:],  # Skip first stage as it's the baseline
+        tuple(analysis_results['stage_analysis']['Conversion Rate (%)'][1:])
     )
-    
-    fig_conversion.update_layout(height=400)
-    st.plotly_chart(fig_conversion, use_container_width=True)
+    st.plotly_chart(fig_conversion, use_container_width=True, config={'displaylogo': False}, key="conversion_chart")
     
     # AI-powered insights
     st.subheader("🤖 AI-Powered Insights & Recommendations")
     
-    with st.spinner("Generating AI insights..."):
-        insights = ai_insights.generate_insights(analysis_results, funnel_data)
+    # Reuse the session's insights and their JSON export while the inputs are
+    # unchanged, even if the cache_data entry has been evicted in the meantime.
+    # Only successful insights are remembered, so failures retry on each rerun.
+    insight_key = (funnel_items, threshold)
+    if st.session_state.get('insight_key') != insight_key:
+        try:
+            st.session_state.insights = cached_insights(funnel_items, threshold)
+            st.session_state.insights_json = json.dumps(st.session_state.insights, indent=2)
+            st.session_state.insight_key = insight_key
+        except InsightsUnavailable:
+            st.session_state.insights = None
+            st.session_state.insights_json = NO_INSIGHTS_JSON
+    insights = st.session_state.insights
+    
+    if insights:
+        # Display insights in expandable sections
+        with st.expander("🔍 Funnel Analysis Summary", expanded=True):
+            st.write(insights.get('summary', 'No summary available'))
         
-        if insights:
-            # Display insights in expandable sections
-            with st.expander("🔍 Funnel Analysis Summary", expanded=True):
-                st.write(insights.get('summary', 'No summary available'))
-            
-            with st.expander("💡 Actionable Recommendations", expanded=True):
-                recommendations = insights.get('recommendations', [])
-                if recommendations:
-                    for i, rec in enumerate(recommendations, 1):
-                        st.write(f"**{i}.** {rec}")
-                else:
-                    st.write("No specific recommendations available")
-            
-            with st.expander("📈 Optimization Priorities", expanded=True):
-                priorities = insights.get('priorities', [])
-                if priorities:
-                    for priority in priorities:
-                        st.write(f"• {priority}")
-                else:
-                    st.write("No specific priorities identified")
-        else:
-            st.error("Unable to generate AI insights. Please check your OpenAI API key.")
+        with st.expander("💡 Actionable Recommendations", expanded=True):
+            recommendations = insights.get('recommendations', [])
+            if recommendations:
+                for i, rec in enumerate(recommendations, 1):
+                    st.write(f"**{i}.** {rec}")
+            else:
+                st.write("No specific recommendations available")
+        
+        with st.expander("📈 Optimization Priorities", expanded=True):
+            priorities = insights.get('priorities', [])
+            if priorities:
+                for priority in priorities:
+                    st.write(f"• {priority}")
+            else:
+                st.write("No specific priorities identified")
+    else:
+        st.error("Unable to generate AI insights. Please check your OpenAI API key.")
+    
+    # Report text is built once per analysis and handed to the UI as-is
+    st.session_state.export_strings = cached_export_strings(
+        tuple((column, tuple(column_values)) for column, column_values in analysis_results['stage_analysis'].items()),
+        st.session_state.insights_json,
+        {
+            'generated_at': stamp_iso,
+            'report_date': stamp_date,
+            'threshold': threshold,
+            'time_period': time_period,
+            'traffic_sources': tuple(traffic_source),
+            'total_visitors': first_count,
+            'final_conversions': last_count,
+            'overall_conversion': overall_conversion,
+            'problematic_stages': problematic_stages
+        }
+    )
+    export_strings = st.session_state.export_strings
     
     # Mock integrations section
     st.subheader("📱 Team Notifications")
@@ -391,195 +577,128 @@ if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_
     
     with col1:
         st.markdown("### 💬 Slack Alert Preview")
-        slack_message = f"""
-🚨 **Funnel Drop-off Alert**
-        
-**Analysis Period:** {time_period}
-**Problematic Stages:** {len(analysis_results['problematic_stages'])}
-**Overall Conversion:** {overall_conversion:.1f}%
-
-**Issues Found:**
-{chr(10).join([f"• {stage}" for stage in analysis_results['problematic_stages']])}
-
-**Next Steps:** Review AI recommendations in Trisha dashboard
-        """
-        st.code(slack_message, language="markdown")
+        st.code(export_strings.slack, language="markdown")
     
     with col2:
         st.markdown("### 📋 Notion Report Preview")
-        notion_content = f"""
-# Funnel Analysis Report - {datetime.now().strftime('%Y-%m-%d')}
-
-## Executive Summary
-- **Total Visitors:** {values[0]:,}
-- **Final Conversions:** {values[-1]:,}
-- **Overall Rate:** {overall_conversion:.1f}%
-- **Issues:** {len(analysis_results['problematic_stages'])} problematic stages
-
-## Key Findings
-{chr(10).join([f"- {stage} needs attention" for stage in analysis_results['problematic_stages']])}
-
-## Status: {'🔴 Needs Attention' if problematic_count > 0 else '🟢 Healthy'}
-        """
-        st.code(notion_content, language="markdown")
+        st.code(export_strings.notion, language="markdown")
     
     # Export functionality
     st.subheader("📥 Export Analysis")
     
     col1, col2, col3 = st.columns(3)
+    stamp_file = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     with col1:
         # Export detailed data as CSV
-        csv_data = pd.DataFrame(analysis_results['stage_analysis']).to_csv(index=False)
         st.download_button(
             label="Download CSV Report",
-            data=csv_data,
-            file_name=f"funnel_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=export_strings.csv,
+            file_name=f"funnel_analysis_{stamp_file}.csv",
             mime="text/csv"
         )
     
     with col2:
         # Export insights as JSON
-        json_data = json.dumps(insights, indent=2) if insights else json.dumps({"error": "No insights available"}, indent=2)
         st.download_button(
             label="Download JSON Insights",
-            data=json_data,
-            file_name=f"funnel_insights_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            data=export_strings.json,
+            file_name=f"funnel_insights_{stamp_file}.json",
             mime="application/json"
         )
     
     with col3:
         # Export summary report
-        summary_report = f"""
-Funnel Analysis Report - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Configuration:
-- Threshold: {threshold}%
-- Period: {time_period}
-- Sources: {', '.join(traffic_source)}
-
-Results:
-- Total Visitors: {values[0]:,}
-- Final Conversions: {values[-1]:,}
-- Overall Conversion Rate: {overall_conversion:.1f}%
-- Problematic Stages: {len(analysis_results['problematic_stages'])}
-
-Stage Details:
-{chr(10).join([f"- {stage['Stage']}: {stage['Count']:,} ({stage['Conversion Rate (%)']:.1f}%)" for stage in analysis_results['stage_analysis']])}
-
-Issues:
-{chr(10).join([f"- {stage}" for stage in analysis_results['problematic_stages']])}
-        """
         st.download_button(
             label="Download Summary Report",
-            data=summary_report,
-            file_name=f"funnel_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            data=export_strings.summary,
+            file_name=f"funnel_summary_{stamp_file}.txt",
             mime="text/plain"
         )
 
-else:
+# Landing page copy, one card per column
+INPUT_METHOD_CARDS = (
+    """
+    **📝 Manual Entry**
+    - Enter your funnel numbers directly
+    - Perfect for quick analysis
+    - Visitors → Leads → MQLs → SQLs
+    """,
+    """
+    **📁 CSV Upload**
+    - Upload your data from Excel/Google Sheets
+    - Download the CSV template
+    - Bulk data import
+    """,
+    """
+    **🔗 API Integration**
+    - Connect to your CRM/Ad platforms
+    - Google Ads, HubSpot, Salesforce
+    - Real-time data sync
+    """,
+    """
+    **🎯 Demo Data**
+    - Test with sample data
+    - See all features in action
+    - Perfect for evaluation
+    """,
+)
+
+FEATURE_CARDS = (
+    """
+    **📈 Smart Analytics**
+    - Automatic drop-off detection
+    - Customizable thresholds
+    - Multi-source analysis
+    - Historical comparisons
+    """,
+    """
+    **🤖 AI Insights**
+    - GPT-4 powered recommendations
+    - Actionable next steps
+    - Priority optimization areas
+    - Performance predictions
+    """,
+    """
+    **📱 Team Integration**
+    - Slack notifications
+    - Notion reports
+    - CSV/JSON exports
+    - Real-time alerts
+    """,
+)
+
+# Landing page shown before the first analysis. Everything here is static and
+# the sample chart is cached, so a rerun only resends the same elements.
+def render_landing():
     # Initial state - show data input instructions
     st.info("👆 Choose your data input method in the sidebar and click **'Run Analysis'** to get started!")
     
     # Show data input options
     st.subheader("📊 How to Input Your Data")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        **📝 Manual Entry**
-        - Enter your funnel numbers directly
-        - Perfect for quick analysis
-        - Visitors → Leads → MQLs → SQLs
-        """)
-    
-    with col2:
-        st.markdown("""
-        **📁 CSV Upload**
-        - Upload your data from Excel/Google Sheets
-        - Download the CSV template
-        - Bulk data import
-        """)
-    
-    with col3:
-        st.markdown("""
-        **🔗 API Integration**
-        - Connect to your CRM/Ad platforms
-        - Google Ads, HubSpot, Salesforce
-        - Real-time data sync
-        """)
-    
-    with col4:
-        st.markdown("""
-        **🎯 Demo Data**
-        - Test with sample data
-        - See all features in action
-        - Perfect for evaluation
-        """)
+    for col, card in zip(st.columns(len(INPUT_METHOD_CARDS)), INPUT_METHOD_CARDS):
+        col.markdown(card)
     
     st.markdown("---")
     
     # Show sample funnel visualization
     st.subheader("📊 Sample Funnel Visualization")
     
-    sample_data = {
-        'Visitor': 1000,
-        'Lead': 500,
-        'MQL': 250,
-        'SQL': 100
-    }
-    
-    stages = list(sample_data.keys())
-    values = list(sample_data.values())
-    
-    fig_sample = go.Figure()
-    fig_sample.add_trace(go.Funnel(
-        y=stages,
-        x=values,
-        textinfo="value+percent initial",
-        marker=dict(color=['#4ECDC4', '#4ECDC4', '#FFE66D', '#FF6B6B'])
-    ))
-    
-    fig_sample.update_layout(
-        title="Sample Funnel Analysis (Demo Data)",
-        height=400,
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig_sample, use_container_width=True)
+    # Static illustration: skip Plotly's interaction layer and mode bar
+    st.plotly_chart(build_sample_fig(), use_container_width=True, config={'staticPlot': True, 'displayModeBar': False}, key="sample")
     
     # Feature highlights
     st.subheader("🌟 Key Features")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        **📈 Smart Analytics**
-        - Automatic drop-off detection
-        - Customizable thresholds
-        - Multi-source analysis
-        - Historical comparisons
-        """)
-    
-    with col2:
-        st.markdown("""
-        **🤖 AI Insights**
-        - GPT-4 powered recommendations
-        - Actionable next steps
-        - Priority optimization areas
-        - Performance predictions
-        """)
-    
-    with col3:
-        st.markdown("""
-        **📱 Team Integration**
-        - Slack notifications
-        - Notion reports
-        - CSV/JSON exports
-        - Real-time alerts
-        """)
+    for col, card in zip(st.columns(len(FEATURE_CARDS)), FEATURE_CARDS):
+        col.markdown(card)
+
+# Check if analysis has been run
+if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_complete:
+    render_results(time_period, traffic_source)
+else:
+    render_landing()
 
 # Footer
 st.markdown("---")
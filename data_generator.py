@@ -1,143 +1,197 @@
 import random
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+# Funnel stages in order, matching the generated counts
+FUNNEL_STAGES = ('Visitor', 'Lead', 'MQL', 'SQL')
+
+TRAFFIC_MULTIPLIERS = {
+    'Google Ads': 1.2,
+    'Facebook Ads': 1.0,
+    'Organic': 0.8,
+    'Direct': 0.6,
+    'Email': 0.4
+}
+
+TIME_MULTIPLIERS = {
+    'Last 7 Days': 0.3,
+    'Last 30 Days': 1.0,
+    'Last 90 Days': 2.8
+}
+
+# Define realistic conversion rate ranges
+CONVERSION_RANGES = {
+    'Visitor_to_Lead': (0.015, 0.035),    # 1.5% - 3.5%
+    'Lead_to_MQL': (0.40, 0.65),          # 40% - 65%
+    'MQL_to_SQL': (0.25, 0.50)            # 25% - 50%
+}
+
+def generate_funnel_data(time_period: str = "Last 30 Days",
+                         traffic_sources: List[str] = None,
+                         seed: Optional[int] = None) -> Dict[str, int]:
+    """
+    Generate realistic funnel data based on time period and traffic sources
+    
+    Args:
+        time_period: Time period for analysis
+        traffic_sources: List of traffic sources to include
+        seed: Optional seed; the same seed and inputs give the same funnel
+        
+    Returns:
+        Dictionary with funnel stage counts
+    """
+    rng = random.Random(seed) if seed is not None else random
+    
+    if traffic_sources is None:
+        traffic_sources = ['Google Ads', 'Facebook Ads']
+    
+    # Base visitor count
+    base_visitors = 1000
+    
+    # Apply time period multiplier
+    time_multiplier = TIME_MULTIPLIERS.get(time_period, 1.0)
+    
+    # Apply traffic source multipliers
+    traffic_multiplier = sum(TRAFFIC_MULTIPLIERS.get(source, 1.0) for source in traffic_sources) / len(traffic_sources)
+    
+    # Calculate total visitors
+    total_visitors = int(base_visitors * time_multiplier * traffic_multiplier)
+    
+    # Add some randomness (±20%)
+    randomness = rng.uniform(0.8, 1.2)
+    total_visitors = int(total_visitors * randomness)
+    
+    # Generate funnel with realistic drop-offs
+    funnel_data = _generate_realistic_funnel(total_visitors, rng)
+    
+    return funnel_data
+
+def _generate_realistic_funnel(visitors: int, rng=random) -> Dict[str, int]:
+    """
+    Generate realistic funnel conversion rates
+    
+    Single-funnel wrapper around _generate_realistic_funnel_batch.
+    
+    Args:
+        visitors: Total number of visitors
+        rng: random.Random instance to draw from (defaults to the random module)
+        
+    Returns:
+        Dictionary with stage counts
+    """
+    # Seed the NumPy generator from rng so seeded callers stay reproducible
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    funnel = _generate_realistic_funnel_batch(np.array([visitors]), np_rng)[0]
+    return dict(zip(FUNNEL_STAGES, funnel.tolist()))
+
+def _generate_realistic_funnel_batch(visitors: np.ndarray,
+                                     rng: np.random.Generator) -> np.ndarray:
+    """
+    Generate many realistic funnels at once
+    
+    Draws every rate for all N funnels in one NumPy pass, with a 30% chance
+    per funnel of a problematic Lead_to_MQL or MQL_to_SQL stage.
+    
+    Args:
+        visitors: Array of visitor counts, one per funnel
+        rng: NumPy random generator to draw from
+        
+    Returns:
+        (N, 4) int64 array of Visitor, Lead, MQL and SQL counts
+    """
+    visitors = np.asarray(visitors, dtype=np.int64)
+    n = visitors.shape[0]
+    
+    # Generate conversion rates with some variability
+    visitor_to_lead_rate = rng.uniform(*CONVERSION_RANGES['Visitor_to_Lead'], size=n)
+    lead_to_mql_rate = rng.uniform(*CONVERSION_RANGES['Lead_to_MQL'], size=n)
+    mql_to_sql_rate = rng.uniform(*CONVERSION_RANGES['MQL_to_SQL'], size=n)
+    
+    # Occasionally create problematic stages (for demo purposes), split
+    # evenly between Lead_to_MQL and MQL_to_SQL
+    problematic = rng.random(n) < 0.3
+    lead_to_mql_stage = rng.random(n) < 0.5
+    lead_to_mql_rate = np.where(problematic & lead_to_mql_stage,
+                                rng.uniform(0.20, 0.35, size=n), lead_to_mql_rate)
+    mql_to_sql_rate = np.where(problematic & ~lead_to_mql_stage,
+                               rng.uniform(0.15, 0.30, size=n), mql_to_sql_rate)
+    
+    # Calculate stage counts, truncating like int() and keeping at least 1
+    funnels = np.empty((n, 4), dtype=np.int64)
+    funnels[:, 0] = visitors
+    funnels[:, 1] = np.clip((visitors * visitor_to_lead_rate).astype(np.int64), 1, None)
+    funnels[:, 2] = np.clip((funnels[:, 1] * lead_to_mql_rate).astype(np.int64), 1, None)
+    funnels[:, 3] = np.clip((funnels[:, 2] * mql_to_sql_rate).astype(np.int64), 1, None)
+    
+    return funnels
+
 class DataGenerator:
     """
     Generates realistic funnel data for analysis
+    
+    Thin facade over the module-level generator functions and constants.
     """
     
     def __init__(self):
-        self.traffic_multipliers = {
-            'Google Ads': 1.2,
-            'Facebook Ads': 1.0,
-            'Organic': 0.8,
-            'Direct': 0.6,
-            'Email': 0.4
-        }
-        
-        self.time_multipliers = {
-            'Last 7 Days': 0.3,
-            'Last 30 Days': 1.0,
-            'Last 90 Days': 2.8
-        }
+        self.traffic_multipliers = TRAFFIC_MULTIPLIERS
+        self.time_multipliers = TIME_MULTIPLIERS
     
     def generate_funnel_data(self, time_period: str = "Last 30 Days", 
-                           traffic_sources: List[str] = None) -> Dict[str, int]:
+                           traffic_sources: List[str] = None,
+                           seed: Optional[int] = None) -> Dict[str, int]:
         """
-        Generate realistic funnel data based on time period and traffic sources
-        
-        Args:
-            time_period: Time period for analysis
-            traffic_sources: List of traffic sources to include
-            
-        Returns:
-            Dictionary with funnel stage counts
+        Generate realistic funnel data; see generate_funnel_data()
         """
-        if traffic_sources is None:
-            traffic_sources = ['Google Ads', 'Facebook Ads']
-        
-        # Base visitor count
-        base_visitors = 1000
-        
-        # Apply time period multiplier
-        time_multiplier = self.time_multipliers.get(time_period, 1.0)
-        
-        # Apply traffic source multipliers
-        traffic_multiplier = sum(self.traffic_multipliers.get(source, 1.0) for source in traffic_sources) / len(traffic_sources)
-        
-        # Calculate total visitors
-        total_visitors = int(base_visitors * time_multiplier * traffic_multiplier)
-        
-        # Add some randomness (±20%)
-        randomness = random.uniform(0.8, 1.2)
-        total_visitors = int(total_visitors * randomness)
-        
-        # Generate funnel with realistic drop-offs
-        funnel_data = self._generate_realistic_funnel(total_visitors)
-        
-        return funnel_data
+        return generate_funnel_data(time_period, traffic_sources, seed)
     
-    def _generate_realistic_funnel(self, visitors: int) -> Dict[str, int]:
+    def _generate_realistic_funnel(self, visitors: int, rng=random) -> Dict[str, int]:
         """
-        Generate realistic funnel conversion rates
-        
-        Args:
-            visitors: Total number of visitors
-            
-        Returns:
-            Dictionary with stage counts
+        Generate realistic funnel conversion rates; see _generate_realistic_funnel()
         """
-        # Define realistic conversion rate ranges
-        conversion_ranges = {
-            'Visitor_to_Lead': (0.015, 0.035),    # 1.5% - 3.5%
-            'Lead_to_MQL': (0.40, 0.65),          # 40% - 65%
-            'MQL_to_SQL': (0.25, 0.50)            # 25% - 50%
-        }
-        
-        # Generate conversion rates with some variability
-        visitor_to_lead_rate = random.uniform(*conversion_ranges['Visitor_to_Lead'])
-        lead_to_mql_rate = random.uniform(*conversion_ranges['Lead_to_MQL'])
-        mql_to_sql_rate = random.uniform(*conversion_ranges['MQL_to_SQL'])
-        
-        # Occasionally create problematic stages (for demo purposes)
-        if random.random() < 0.3:  # 30% chance of having a problematic stage
-            problematic_stage = random.choice(['Lead_to_MQL', 'MQL_to_SQL'])
-            if problematic_stage == 'Lead_to_MQL':
-                lead_to_mql_rate = random.uniform(0.20, 0.35)  # Lower conversion
-            else:
-                mql_to_sql_rate = random.uniform(0.15, 0.30)   # Lower conversion
-        
-        # Calculate stage counts
-        leads = int(visitors * visitor_to_lead_rate)
-        mqls = int(leads * lead_to_mql_rate)
-        sqls = int(mqls * mql_to_sql_rate)
-        
-        # Ensure minimum counts
-        leads = max(1, leads)
-        mqls = max(1, mqls)
-        sqls = max(1, sqls)
-        
-        return {
-            'Visitor': visitors,
-            'Lead': leads,
-            'MQL': mqls,
-            'SQL': sqls
-        }
-    
-    def generate_historical_data(self, days: int = 30) -> pd.DataFrame:
+        return _generate_realistic_funnel(visitors, rng)
+    
+    def _generate_realistic_funnel_batch(self, visitors: np.ndarray,
+                                         rng: np.random.Generator) -> np.ndarray:
+        """
+        Generate many realistic funnels at once; see _generate_realistic_funnel_batch()
+        """
+        return _generate_realistic_funnel_batch(visitors, rng)
+    
+    def generate_historical_data(self, days: int = 30, seed: Optional[int] = None) -> pd.DataFrame:
         """
         Generate historical funnel data for trend analysis
         
         Args:
             days: Number of days of historical data
+            seed: Optional seed for reproducible data
             
         Returns:
             DataFrame with daily funnel data
         """
-        historical_data = []
+        rng = np.random.default_rng(seed)
+        now = datetime.now()
+        dates = [now - timedelta(days=days-i) for i in range(days)]
         
-        for i in range(days):
-            date = datetime.now() - timedelta(days=days-i)
-            
-            # Generate daily data with some trends
-            base_visitors = random.randint(800, 1200)
-            
-            # Add weekly patterns (higher on weekdays)
-            if date.weekday() < 5:  # Monday to Friday
-                base_visitors = int(base_visitors * 1.1)
-            
-            daily_funnel = self._generate_realistic_funnel(base_visitors)
-            
-            for stage, count in daily_funnel.items():
-                historical_data.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'stage': stage,
-                    'count': count
-                })
+        # Generate daily data with some trends
+        base_visitors = rng.integers(800, 1200, size=days, endpoint=True)
+        
+        # Add weekly patterns (higher on weekdays)
+        weekdays = np.array([date.weekday() < 5 for date in dates], dtype=bool)
+        base_visitors = np.where(weekdays, (base_visitors * 1.1).astype(np.int64), base_visitors)
+        
+        daily_funnels = _generate_realistic_funnel_batch(base_visitors, rng)
+        
+        # Build the long-format frame column by column: each date repeats for
+        # its four stages and the counts are the funnel rows flattened
+        date_strs = [date.strftime('%Y-%m-%d') for date in dates]
         
-        return pd.DataFrame(historical_data)
+        return pd.DataFrame({
+            'date': np.repeat(date_strs, len(FUNNEL_STAGES)),
+            'stage': np.tile(FUNNEL_STAGES, days),
+            'count': daily_funnels.ravel()
+        })
     
     def generate_traffic_source_breakdown(self, funnel_data: Dict[str, int], 
                                         traffic_sources: List[str]) -> Dict[str, Dict[str, int]]:
@@ -1,76 +1,98 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any
 
+# Funnel stages in order
+FUNNEL_STAGES = ('Visitor', 'Lead', 'MQL', 'SQL')
+
+# Industry benchmark conversion rates (these are typical B2B SaaS benchmarks):
+# 2% of visitors become leads, 50% of leads become MQLs, 40% of MQLs become
+# SQLs and 0.4% convert overall
+BENCHMARK_NAMES = ('Visitor to Lead', 'Lead to MQL', 'MQL to SQL', 'Overall')
+BENCHMARK_RATES = np.array([2.0, 50.0, 40.0, 0.4])
+
+def analyze_funnel(funnel_data: Dict[str, int], threshold: float) -> Dict[str, Any]:
+    """
+    Analyze funnel data and identify problematic stages
+    
+    Args:
+        funnel_data: Dictionary with stage names as keys and counts as values
+        threshold: Drop-off threshold percentage (30-40)
+        
+    Returns:
+        Dictionary containing analysis results. 'stage_analysis' is columnar:
+        a dict mapping each column name to a list with one value per stage.
+    """
+    stages = list(funnel_data.keys())
+    values = list(funnel_data.values())
+    
+    # Calculate conversion rates and drop-offs in one vectorized pass;
+    # the first stage (Visitor) is the 100% baseline. A stage after an empty
+    # stage converts nothing, so it shows a full drop-off and gets flagged
+    counts = np.fromiter(values, dtype=np.float64, count=len(values))
+    conversion_rates = np.zeros_like(counts)
+    conversion_rates[0] = 100.0
+    np.divide(counts[1:], counts[:-1], out=conversion_rates[1:], where=counts[:-1] > 0)
+    conversion_rates[1:] *= 100
+    drop_offs = 100 - conversion_rates
+    
+    # Check which drop-offs exceed the threshold
+    problematic_mask = drop_offs > threshold
+    problematic_mask[0] = False
+    problematic_stages = [stage for stage, flagged in zip(stages, problematic_mask.tolist()) if flagged]
+    
+    # Rounded with Python's round() so values match the scalar computation
+    rounded_rates = [round(rate, 1) for rate in conversion_rates.tolist()]
+    rounded_drops = [round(drop, 1) for drop in drop_offs.tolist()]
+    
+    # Columnar per-stage table; plain lists keep it JSON- and hash-friendly
+    stage_analysis = {
+        'Stage': stages,
+        'Count': values,
+        'Conversion Rate (%)': rounded_rates,
+        'Drop-off (%)': rounded_drops,
+        'Status': ['🔴 Needs Attention' if flagged else '🟢 Healthy' for flagged in problematic_mask.tolist()]
+    }
+    
+    # Calculate overall funnel health
+    overall_conversion = (values[-1] / values[0]) * 100 if values[0] > 0 else 0.0
+    
+    # Identify biggest drop-off (first stage wins ties; none unless positive)
+    biggest_drop_stage = None
+    biggest_drop_value = 0
+    
+    if len(stages) > 1:
+        biggest_idx = int(np.argmax(rounded_drops[1:])) + 1
+        if rounded_drops[biggest_idx] > 0:
+            biggest_drop_value = rounded_drops[biggest_idx]
+            biggest_drop_stage = stages[biggest_idx]
+    
+    return {
+        'stage_analysis': stage_analysis,
+        'problematic_stages': problematic_stages,
+        'overall_conversion': overall_conversion,
+        'biggest_drop_stage': biggest_drop_stage,
+        'biggest_drop_value': biggest_drop_value,
+        'threshold_used': threshold,
+        'total_visitors': values[0],
+        'final_conversions': values[-1]
+    }
+
 class FunnelAnalyzer:
     """
     Analyzes funnel data to identify drop-offs and calculate conversion rates
+    
+    analyze_funnel is a thin facade over the module-level function.
     """
     
     def __init__(self):
-        self.funnel_stages = ['Visitor', 'Lead', 'MQL', 'SQL']
+        self.funnel_stages = list(FUNNEL_STAGES)
     
     def analyze_funnel(self, funnel_data: Dict[str, int], threshold: float) -> Dict[str, Any]:
         """
-        Analyze funnel data and identify problematic stages
-        
-        Args:
-            funnel_data: Dictionary with stage names as keys and counts as values
-            threshold: Drop-off threshold percentage (30-40)
-            
-        Returns:
-            Dictionary containing analysis results
+        Analyze funnel data and identify problematic stages; see analyze_funnel()
         """
-        stages = list(funnel_data.keys())
-        values = list(funnel_data.values())
-        
-        # Calculate conversion rates and drop-offs
-        stage_analysis = []
-        problematic_stages = []
-        
-        for i, stage in enumerate(stages):
-            if i == 0:
-                # First stage (Visitor) - baseline
-                conversion_rate = 100.0
-                drop_off = 0.0
-            else:
-                # Calculate conversion rate from previous stage
-                conversion_rate = (values[i] / values[i-1]) * 100
-                drop_off = 100 - conversion_rate
-                
-                # Check if drop-off exceeds threshold
-                if drop_off > threshold:
-                    problematic_stages.append(stage)
-            
-            stage_analysis.append({
-                'Stage': stage,
-                'Count': values[i],
-                'Conversion Rate (%)': round(conversion_rate, 1),
-                'Drop-off (%)': round(drop_off, 1),
-                'Status': '🔴 Needs Attention' if stage in problematic_stages else '🟢 Healthy'
-            })
-        
-        # Calculate overall funnel health
-        overall_conversion = (values[-1] / values[0]) * 100
-        
-        # Identify biggest drop-off
-        biggest_drop_stage = None
-        biggest_drop_value = 0
-        
-        for i in range(1, len(stage_analysis)):
-            if stage_analysis[i]['Drop-off (%)'] > biggest_drop_value:
-                biggest_drop_value = stage_analysis[i]['Drop-off (%)']
-                biggest_drop_stage = stage_analysis[i]['Stage']
-        
-        return {
-            'stage_analysis': stage_analysis,
-            'problematic_stages': problematic_stages,
-            'overall_conversion': overall_conversion,
-            'biggest_drop_stage': biggest_drop_stage,
-            'biggest_drop_value': biggest_drop_value,
-            'threshold_used': threshold,
-            'total_visitors': values[0],
-            'final_conversions': values[-1]
-        }
+        return analyze_funnel(funnel_data, threshold)
     
     def calculate_potential_impact(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -83,31 +105,27 @@ class FunnelAnalyzer:
             Dictionary with potential impact calculations
         """
         stage_analysis = analysis_results['stage_analysis']
-        problematic_stages = analysis_results['problematic_stages']
+        problematic_stages = set(analysis_results['problematic_stages'])
         
         impact_analysis = {}
         
-        for stage_data in stage_analysis:
-            if stage_data['Stage'] in problematic_stages:
-                current_count = stage_data['Count']
-                
-                # Calculate potential if drop-off was reduced to threshold
-                threshold = analysis_results['threshold_used']
-                improved_conversion = (100 - threshold) / 100
-                
-                # Find previous stage count
-                prev_stage_index = None
-                for i, s in enumerate(stage_analysis):
-                    if s['Stage'] == stage_data['Stage']:
-                        prev_stage_index = i - 1
-                        break
+        # Calculate potential if drop-off was reduced to threshold
+        threshold = analysis_results['threshold_used']
+        improved_conversion = (100 - threshold) / 100
+        
+        counts = stage_analysis['Count']
+        
+        # Stages are ordered, so the previous stage is simply the prior row
+        for i, stage in enumerate(stage_analysis['Stage']):
+            if stage in problematic_stages:
+                current_count = counts[i]
                 
-                if prev_stage_index is not None and prev_stage_index >= 0:
-                    prev_count = stage_analysis[prev_stage_index]['Count']
+                if i > 0:
+                    prev_count = counts[i - 1]
                     potential_count = int(prev_count * improved_conversion)
                     potential_increase = potential_count - current_count
                     
-                    impact_analysis[stage_data['Stage']] = {
+                    impact_analysis[stage] = {
                         'current_count': current_count,
                         'potential_count': potential_count,
                         'potential_increase': potential_increase,
@@ -126,40 +144,38 @@ class FunnelAnalyzer:
         Returns:
             Dictionary with benchmark comparisons
         """
-        # Industry benchmark conversion rates (these are typical B2B SaaS benchmarks)
-        benchmarks = {
-            'Visitor to Lead': 2.0,  # 2% of visitors become leads
-            'Lead to MQL': 50.0,     # 50% of leads become MQLs
-            'MQL to SQL': 40.0,      # 40% of MQLs become SQLs
-            'Overall': 0.4           # 0.4% overall conversion
-        }
-        
         stage_analysis = analysis_results['stage_analysis']
+        stages = stage_analysis['Stage']
+        
+        # Actual conversion rate for each stage transition, then overall
+        transitions = [f"{prev_stage} to {current_stage}" for prev_stage, current_stage in zip(stages, stages[1:])]
+        transitions.append('Overall')
+        actual_rates = list(stage_analysis['Conversion Rate (%)'][1:])
+        actual_rates.append(analysis_results['overall_conversion'])
+        
+        # Line each benchmarked rate up with its benchmark
+        matched = [
+            (name, rate, BENCHMARK_NAMES.index(name))
+            for name, rate in zip(transitions, actual_rates)
+            if name in BENCHMARK_NAMES
+        ]
+        names, actual, benchmark_idx = zip(*matched)
+        
+        # Compare with benchmarks in one pass
+        actual_arr = np.array(actual, dtype=np.float64)
+        benchmark_arr = BENCHMARK_RATES[list(benchmark_idx)]
+        difference = actual_arr - benchmark_arr
+        performance = np.where(difference > 0, "Above", "Below")
         
-        # Calculate actual conversion rates
-        actual_rates = {}
-        for i in range(1, len(stage_analysis)):
-            prev_stage = stage_analysis[i-1]['Stage']
-            current_stage = stage_analysis[i]['Stage']
-            stage_key = f"{prev_stage} to {current_stage}"
-            actual_rates[stage_key] = stage_analysis[i]['Conversion Rate (%)']
-        
-        # Overall conversion rate
-        actual_rates['Overall'] = analysis_results['overall_conversion']
-        
-        # Compare with benchmarks
         comparison = {}
-        for stage, actual_rate in actual_rates.items():
-            if stage in benchmarks:
-                benchmark_rate = benchmarks[stage]
-                performance = "Above" if actual_rate > benchmark_rate else "Below"
-                difference = actual_rate - benchmark_rate
-                
-                comparison[stage] = {
-                    'actual': actual_rate,
-                    'benchmark': benchmark_rate,
-                    'performance': performance,
-                    'difference': difference
-                }
+        for name, actual_rate, benchmark_rate, perf, diff in zip(
+            names, actual, benchmark_arr.tolist(), performance.tolist(), difference.tolist()
+        ):
+            comparison[name] = {
+                'actual': actual_rate,
+                'benchmark': benchmark_rate,
+                'performance': perf,
+                'difference': diff
+            }
         
         return comparison
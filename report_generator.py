@@ -0,0 +1,179 @@
+import csv
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, Sequence
+
+# Column name -> one value per stage, as returned by analyze_funnel
+StageColumns = Dict[str, Sequence[Any]]
+
+@dataclass(frozen=True)
+class ExportStrings:
+    """
+    Text payloads for the dashboard's notification previews and downloads
+    """
+    csv: str
+    json: str
+    summary: str
+    slack: str
+    notion: str
+
+def build_stage_csv(stage_analysis: StageColumns) -> str:
+    """
+    Serialize the per-stage table as CSV
+    
+    Writes the rows directly with csv.writer rather than building a
+    DataFrame just to call to_csv.
+    
+    Args:
+        stage_analysis: Columnar per-stage table from the analysis
+        
+    Returns:
+        CSV text with a header row
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(stage_analysis.keys())
+    writer.writerows(zip(*stage_analysis.values()))
+    return buffer.getvalue()
+
+def build_slack_message(time_period: str, overall_conversion: float,
+                        problematic_stages: Sequence[str]) -> str:
+    """
+    Build the Slack alert preview
+    
+    Args:
+        time_period: Analysis period label
+        overall_conversion: Overall conversion rate in percent
+        problematic_stages: Stages flagged by the analysis
+    
+    Returns:
+        Markdown message text
+    """
+    issues = "\n".join(f"• {stage}" for stage in problematic_stages)
+    return f"""
+🚨 **Funnel Drop-off Alert**
+        
+**Analysis Period:** {time_period}
+**Problematic Stages:** {len(problematic_stages)}
+**Overall Conversion:** {overall_conversion:.1f}%
+
+**Issues Found:**
+{issues}
+
+**Next Steps:** Review AI recommendations in Trisha dashboard
+        """
+
+def build_notion_content(report_date: str, total_visitors: int, final_conversions: int,
+                         overall_conversion: float, problematic_stages: Sequence[str]) -> str:
+    """
+    Build the Notion report preview
+    
+    Args:
+        report_date: Report date label
+        total_visitors: Count at the first stage
+        final_conversions: Count at the last stage
+        overall_conversion: Overall conversion rate in percent
+        problematic_stages: Stages flagged by the analysis
+    
+    Returns:
+        Markdown report text
+    """
+    findings = "\n".join(f"- {stage} needs attention" for stage in problematic_stages)
+    return f"""
+# Funnel Analysis Report - {report_date}
+
+## Executive Summary
+- **Total Visitors:** {total_visitors:,}
+- **Final Conversions:** {final_conversions:,}
+- **Overall Rate:** {overall_conversion:.1f}%
+- **Issues:** {len(problematic_stages)} problematic stages
+
+## Key Findings
+{findings}
+
+## Status: {'🔴 Needs Attention' if problematic_stages else '🟢 Healthy'}
+        """
+
+def build_summary_report(stage_analysis: StageColumns, generated_at: str, threshold: float,
+                         time_period: str, traffic_sources: Sequence[str], total_visitors: int,
+                         final_conversions: int, overall_conversion: float,
+                         problematic_stages: Sequence[str]) -> str:
+    """
+    Build the plain-text summary report download
+    
+    Args:
+        stage_analysis: Columnar per-stage table from the analysis
+        generated_at: Report timestamp label
+        threshold: Drop-off threshold used
+        time_period: Analysis period label
+        traffic_sources: Traffic sources included
+        total_visitors: Count at the first stage
+        final_conversions: Count at the last stage
+        overall_conversion: Overall conversion rate in percent
+        problematic_stages: Stages flagged by the analysis
+    
+    Returns:
+        Report text
+    """
+    stage_details = "\n".join(
+        f"- {stage}: {count:,} ({rate:.1f}%)"
+        for stage, count, rate in zip(stage_analysis['Stage'], stage_analysis['Count'],
+                                      stage_analysis['Conversion Rate (%)'])
+    )
+    issues = "\n".join(f"- {stage}" for stage in problematic_stages)
+    return f"""
+Funnel Analysis Report - {generated_at}
+
+Configuration:
+- Threshold: {threshold}%
+- Period: {time_period}
+- Sources: {', '.join(traffic_sources)}
+
+Results:
+- Total Visitors: {total_visitors:,}
+- Final Conversions: {final_conversions:,}
+- Overall Conversion Rate: {overall_conversion:.1f}%
+- Problematic Stages: {len(problematic_stages)}
+
+Stage Details:
+{stage_details}
+
+Issues:
+{issues}
+        """
+
+def build_export_strings(stage_analysis: StageColumns, insights_json: str, generated_at: str,
+                         report_date: str, threshold: float, time_period: str,
+                         traffic_sources: Sequence[str], total_visitors: int, final_conversions: int,
+                         overall_conversion: float, problematic_stages: Sequence[str]) -> ExportStrings:
+    """
+    Build every export and preview string for one analysis
+    
+    Args:
+        stage_analysis: Columnar per-stage table from the analysis
+        insights_json: Serialized AI insights
+        generated_at: Report timestamp label
+        report_date: Report date label
+        threshold: Drop-off threshold used
+        time_period: Analysis period label
+        traffic_sources: Traffic sources included
+        total_visitors: Count at the first stage
+        final_conversions: Count at the last stage
+        overall_conversion: Overall conversion rate in percent
+        problematic_stages: Stages flagged by the analysis
+    
+    Returns:
+        ExportStrings with the CSV, JSON, summary, Slack and Notion text
+    """
+    return ExportStrings(
+        csv=build_stage_csv(stage_analysis),
+        json=insights_json,
+        summary=build_summary_report(
+            stage_analysis, generated_at, threshold, time_period, traffic_sources,
+            total_visitors, final_conversions, overall_conversion, problematic_stages
+        ),
+        slack=build_slack_message(time_period, overall_conversion, problematic_stages),
+        notion=build_notion_content(
+            report_date, total_visitors, final_conversions, overall_conversion, problematic_stages
+        )
+    )